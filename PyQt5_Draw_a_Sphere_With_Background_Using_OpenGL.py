@@ -1,10 +1,327 @@
+import os
 import sys
+import ctypes
+import numpy as np
 from PyQt5.QtWidgets import QApplication, QMainWindow, QOpenGLWidget
-from PyQt5.QtCore import QTimer
+from PyQt5.QtCore import QElapsedTimer, QMutex, QRunnable, QThreadPool, QTimer, QWaitCondition
+from PyQt5.QtGui import QHideEvent, QShowEvent, QSurfaceFormat, QWindow
 from OpenGL.GL import *
-from OpenGL.GLU import *
+from OpenGL.GL.EXT.texture_filter_anisotropic import (
+    glInitTextureFilterAnisotropicEXT, GL_TEXTURE_MAX_ANISOTROPY_EXT, GL_MAX_TEXTURE_MAX_ANISOTROPY_EXT
+)
 from PIL import Image
 
+PRIMITIVE_RESTART_INDEX = 0xFFFFFFFF  # Index that ends the current triangle strip
+# Packed sphere vertex: normalized int16 position and normal, normalized uint16 UV (16 bytes)
+SPHERE_VERTEX_DTYPE = np.dtype([('pos', '<i2', 3), ('nrm', '<i2', 3), ('uv', '<u2', 2)])
+MAX_ANISOTROPY = 16.0  # Upper bound for anisotropic texture filtering
+ROTATION_SPEED = 30.0  # Sphere rotation speed in degrees per second
+FRAME_TIMEOUT_MS = 50  # Fallback repaint delay when no frame has been swapped
+TEXTURE_CACHE_SUFFIX = ".rgba.npy"  # Suffix of the decoded texture cache next to each image
+
+# Shaders drawing the textured sphere transformed by a model-view-projection matrix
+SPHERE_VERTEX_SHADER = """
+#version 330 core
+layout(location = 0) in vec3 aPos;
+layout(location = 2) in vec2 aUV;
+uniform mat4 uMVP;
+out vec2 vUV;
+
+void main() {
+    gl_Position = uMVP * vec4(aPos, 1.0);
+    vUV = aUV;
+}
+"""
+
+SPHERE_FRAGMENT_SHADER = """
+#version 330 core
+uniform sampler2D uTex;
+in vec2 vUV;
+out vec4 outColor;
+
+void main() {
+    outColor = texture(uTex, vUV);
+}
+"""
+
+# Shaders drawing the background quad directly in clip space
+BACKGROUND_VERTEX_SHADER = """
+#version 330 core
+layout(location = 0) in vec2 aPos;
+layout(location = 1) in vec2 aUV;
+out vec2 vUV;
+
+void main() {
+    gl_Position = vec4(aPos, 0.0, 1.0);
+    vUV = aUV;
+}
+"""
+
+BACKGROUND_FRAGMENT_SHADER = """
+#version 330 core
+uniform sampler2D uTex;
+in vec2 vUV;
+out vec4 outColor;
+
+void main() {
+    outColor = texture(uTex, vUV);
+}
+"""
+
+
+def compile_program(vertex_source: str, fragment_source: str) -> int:
+    """
+    Compile and link a GLSL program from vertex and fragment shader sources.
+
+    :param vertex_source: The GLSL source of the vertex shader.
+    :param fragment_source: The GLSL source of the fragment shader.
+    :return: The OpenGL program ID.
+    """
+    program = glCreateProgram()
+    shaders = []
+    for shader_type, source in ((GL_VERTEX_SHADER, vertex_source), (GL_FRAGMENT_SHADER, fragment_source)):
+        shader = glCreateShader(shader_type)
+        glShaderSource(shader, source)
+        glCompileShader(shader)
+        if not glGetShaderiv(shader, GL_COMPILE_STATUS):
+            raise RuntimeError(f"Shader compilation failed: {glGetShaderInfoLog(shader).decode()}")
+        glAttachShader(program, shader)
+        shaders.append(shader)
+
+    glLinkProgram(program)
+    if not glGetProgramiv(program, GL_LINK_STATUS):
+        raise RuntimeError(f"Program linking failed: {glGetProgramInfoLog(program).decode()}")
+
+    # The linked program keeps its own copy of the compiled code
+    for shader in shaders:
+        glDetachShader(program, shader)
+        glDeleteShader(shader)
+
+    return program
+
+
+def read_texture_cache(image_file: str) -> np.ndarray:
+    """
+    Memory-map the decoded pixels cached next to an image by decode_image.
+
+    :param image_file: The file path of the cached image.
+    :return: The (height, width, 4) uint8 pixel array, or None if there is no usable cache.
+    """
+    cache_file = image_file + TEXTURE_CACHE_SUFFIX
+    try:
+        if os.path.getmtime(cache_file) < os.path.getmtime(image_file):
+            return None  # The image changed since the cache was written
+        pixels = np.load(cache_file, mmap_mode="r")
+    except (OSError, ValueError):
+        return None  # Missing, truncated or not a NumPy file
+
+    if not isinstance(pixels, np.ndarray) or pixels.dtype != np.uint8 or pixels.ndim != 3 or pixels.shape[2] != 4:
+        return None
+    return pixels
+
+
+def decode_image(image_file: str) -> np.ndarray:
+    """
+    Decode an image into flipped RGBA pixels ready to be uploaded as a texture.
+
+    The decoded pixels are cached next to the image in a .npy file, which is memory-mapped
+    instead of decoding the image again as long as it is newer than the image.
+
+    :param image_file: The file path of the image to decode.
+    :return: The (height, width, 4) uint8 pixel array.
+    """
+    pixels = read_texture_cache(image_file)
+    if pixels is None:
+        pixels = decode_pixels(image_file)
+        write_texture_cache(image_file, pixels)
+    return pixels
+
+
+def decode_pixels(image_file: str) -> np.ndarray:
+    """
+    Decode an image with Pillow into flipped RGBA pixels, without using the cache.
+
+    :param image_file: The file path of the image to decode.
+    :return: The (height, width, 4) uint8 pixel array.
+    """
+    # Load the image using Pillow
+    image = Image.open(image_file)
+    image = image.transpose(Image.FLIP_TOP_BOTTOM)  # Flip the image vertically for OpenGL
+    return np.asarray(image.convert("RGBA"))  # Copied out by Pillow's array interface (tobytes())
+
+
+def write_texture_cache(image_file: str, pixels: np.ndarray) -> None:
+    """
+    Save decoded pixels next to an image, to be memory-mapped by read_texture_cache.
+
+    :param image_file: The file path of the decoded image.
+    :param pixels: The (height, width, 4) uint8 pixel array.
+    """
+    # Write to a temporary file first so an interrupted save never leaves a truncated cache
+    cache_file = image_file + TEXTURE_CACHE_SUFFIX
+    temp_file = cache_file + ".tmp"
+    try:
+        with open(temp_file, "wb") as f:
+            np.save(f, pixels)
+        os.replace(temp_file, cache_file)
+    except OSError:
+        # The cache is optional, e.g. when the image lives in a read-only directory
+        try:
+            os.remove(temp_file)
+        except OSError:
+            pass
+
+
+def perspective(fovy: float, aspect: float, near: float, far: float) -> np.ndarray:
+    """
+    Build a perspective projection matrix, equivalent to gluPerspective.
+
+    :param fovy: The vertical field of view in degrees.
+    :param aspect: The aspect ratio (width / height) of the viewport.
+    :param near: The distance to the near clipping plane.
+    :param far: The distance to the far clipping plane.
+    :return: The 4x4 projection matrix (row-major).
+    """
+    f = 1.0 / np.tan(np.radians(fovy) / 2.0)
+    return np.array([[f / aspect, 0.0, 0.0, 0.0],
+                     [0.0, f, 0.0, 0.0],
+                     [0.0, 0.0, (far + near) / (near - far), 2.0 * far * near / (near - far)],
+                     [0.0, 0.0, -1.0, 0.0]], dtype=np.float32)
+
+
+def sphere_mesh(slices: int, stacks: int) -> tuple:
+    """
+    Build the vertices and triangle strip indices of a unit sphere.
+
+    Each vertex is packed as SPHERE_VERTEX_DTYPE: the unit sphere positions and normals
+    (which are equal) fit normalized int16 and the texture coordinates normalized uint16.
+
+    :param slices: The number of vertical segments (longitude).
+    :param stacks: The number of horizontal segments (latitude).
+    :return: The (vertices, indices) arrays.
+    """
+    # Same layout as gluSphere: poles on the z-axis, latitude running from +z (0) to -z (pi)
+    # and longitude starting at +y
+    phi, theta = np.meshgrid(np.linspace(0.0, np.pi, stacks + 1),
+                             np.linspace(0.0, 2.0 * np.pi, slices + 1), indexing="ij")
+    x = -np.sin(theta) * np.sin(phi)
+    y = np.cos(theta) * np.sin(phi)
+    z = np.cos(phi)
+    u = theta / (2.0 * np.pi)
+    v = 1.0 - phi / np.pi
+    positions = np.round(np.stack([x, y, z], axis=-1).reshape(-1, 3) * 32767).astype(np.int16)
+    vertices = np.empty(len(positions), dtype=SPHERE_VERTEX_DTYPE)
+    vertices['pos'] = positions
+    vertices['nrm'] = positions
+    vertices['uv'] = np.round(np.stack([u, v], axis=-1).reshape(-1, 2) * 65535).astype(np.uint16)
+
+    # One triangle strip per stack, separated by the primitive restart index
+    top = np.arange(stacks)[:, None] * (slices + 1) + np.arange(slices + 1)
+    bottom = top + slices + 1
+    strips = np.stack([top, bottom], axis=-1).reshape(stacks, -1)
+    restart = np.full((stacks, 1), PRIMITIVE_RESTART_INDEX)
+    indices = np.ravel(np.concatenate([strips, restart], axis=1)).astype(np.uint32)
+
+    return vertices, indices
+
+
+def translation(x: float, y: float, z: float) -> np.ndarray:
+    """
+    Build a translation matrix, equivalent to glTranslatef.
+
+    :return: The 4x4 translation matrix (row-major).
+    """
+    matrix = np.identity(4, dtype=np.float32)
+    matrix[:3, 3] = (x, y, z)
+    return matrix
+
+
+def scaling(x: float, y: float, z: float) -> np.ndarray:
+    """
+    Build a scaling matrix, equivalent to glScalef.
+
+    :return: The 4x4 scaling matrix (row-major).
+    """
+    return np.diag([x, y, z, 1.0]).astype(np.float32)
+
+
+def rotation(angle: float, x: float, y: float, z: float) -> np.ndarray:
+    """
+    Build a rotation matrix around an arbitrary axis, equivalent to glRotatef.
+
+    :param angle: The rotation angle in degrees.
+    :return: The 4x4 rotation matrix (row-major).
+    """
+    axis = np.array([x, y, z], dtype=np.float32)
+    axis /= np.linalg.norm(axis)
+    c, s = np.cos(np.radians(angle)), np.sin(np.radians(angle))
+    cross = np.array([[0.0, -axis[2], axis[1]],
+                      [axis[2], 0.0, -axis[0]],
+                      [-axis[1], axis[0], 0.0]], dtype=np.float32)
+    matrix = np.identity(4, dtype=np.float32)
+    matrix[:3, :3] = c * np.identity(3) + (1.0 - c) * np.outer(axis, axis) + s * cross
+    return matrix
+
+
+class TextureDecoder(QRunnable):
+    """
+    A QRunnable decoding an image on a QThreadPool worker thread, then caching it for decode_image.
+    """
+
+    def __init__(self, image_file: str) -> None:
+        """
+        Initialize the decoder for an image file.
+
+        :param image_file: The file path of the image to decode.
+        """
+        super().__init__()
+        # Kept alive by its owner, since run() goes on writing the cache after the handover
+        self.setAutoDelete(False)
+        self.image_file: str = image_file
+        self.pixels: np.ndarray = None  # Decoded pixels, until taken by take()
+        self.error: Exception = None  # Error raised while decoding, re-raised by take()
+        self.done: bool = False
+        self.mutex = QMutex()
+        self.finished = QWaitCondition()
+
+    def run(self) -> None:
+        """
+        Decode the image. Called on a worker thread by the thread pool.
+        """
+        pixels, error = None, None
+        try:
+            pixels = read_texture_cache(self.image_file)
+            cached = pixels is not None
+            if not cached:
+                pixels = decode_pixels(self.image_file)
+        except Exception as e:
+            error = e
+
+        # Hand the pixels over before writing the cache, so the first frame does not wait for it
+        self.mutex.lock()
+        self.pixels, self.error, self.done = pixels, error, True
+        self.finished.wakeAll()
+        self.mutex.unlock()
+
+        if error is None and not cached:
+            write_texture_cache(self.image_file, pixels)
+
+    def take(self) -> np.ndarray:
+        """
+        Wait until the image has been decoded and hand its pixels over to the caller.
+
+        :return: The (height, width, 4) uint8 pixel array, or None if it was already taken.
+        """
+        self.mutex.lock()
+        while not self.done:
+            self.finished.wait(self.mutex)
+        pixels, self.pixels = self.pixels, None  # Do not keep the decoded pixels alive
+        self.mutex.unlock()
+
+        if self.error is not None:
+            raise self.error
+        return pixels
+
 
 class OpenGLWindow(QOpenGLWidget):
     """
@@ -24,25 +341,67 @@ class OpenGLWindow(QOpenGLWidget):
         self.texture_image: str = texture_image  # texture image
         self.bg_texture: int = None  # Texture ID for the background
         self.background_image: str = background_image  # background image
-
-        # Timer to update the frame every 16ms (~60 FPS)
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_frame)
-        self.timer.start(16)
+        self.anisotropy: float = 1.0  # Anisotropic filtering level applied to textures
+        self.projection: np.ndarray = np.identity(4, dtype=np.float32)  # Projection matrix
+        self._gl_state: dict = {}  # Last GL state set through the set_/bind_/use_ helpers
+        self.resized.connect(self.forget_texture_binding)
+
+        # Render into an sRGB framebuffer so linear colors are encoded back on write
+        self.setTextureFormat(GL_SRGB8_ALPHA8)
+
+        # Decode the images in the background while the widget and GL context are created
+        self.texture_decoder = TextureDecoder(texture_image)
+        QThreadPool.globalInstance().start(self.texture_decoder)
+        self.bg_texture_decoder: TextureDecoder = None
+        if len(background_image) > 0:
+            self.bg_texture_decoder = TextureDecoder(background_image)
+            QThreadPool.globalInstance().start(self.bg_texture_decoder)
+
+        # Pick the paint function once, so the per-frame path does not check for a background
+        self.paintGL = self._paint_with_bg if len(background_image) > 0 else self._paint_no_bg
+
+        # Frames are driven by frameSwapped once the widget is shown. The single-shot timer
+        # only kicks the next frame if no frame has been swapped for FRAME_TIMEOUT_MS.
+        self.animating: bool = False
+        self.elapsed = QElapsedTimer()  # Time since the last animation step
+        self.elapsed.start()
+        self.fallback_timer = QTimer(self)
+        self.fallback_timer.setSingleShot(True)
+        self.fallback_timer.setInterval(FRAME_TIMEOUT_MS)
+        self.fallback_timer.timeout.connect(self.update_frame)
+        self.frameSwapped.connect(self.update_frame)  # Next frame once the previous one is presented
+        self.window_handle: QWindow = None  # Top-level window whose visibility is tracked
 
     def initializeGL(self) -> None:
         """
         Set up the OpenGL environment. Called once before rendering starts.
-        Initializes the background color, depth testing, and texture loading.
+        Initializes the background color, depth testing, texture loading and the sphere mesh.
         """
+        # Nothing is known to be bound in a fresh context
+        self._gl_state = {'depth_test': False, 'bound_tex': None, 'program': None, 'vao': None}
+
         glClearColor(0.0, 0.0, 0.0, 1.0)  # Set background color to black
-        glEnable(GL_DEPTH_TEST)  # Enable depth testing for 3D rendering
-        glEnable(GL_TEXTURE_2D)  # Enable texture mapping
-        self.texture = self.load_texture(self.texture_image)  # Load the texture image
+        self.set_depth_test(True)  # Enable depth testing for 3D rendering
+        glEnable(GL_FRAMEBUFFER_SRGB)  # Encode linear shader output to sRGB on write
+        glEnable(GL_PRIMITIVE_RESTART)  # Allow several triangle strips in one draw call
+        glPrimitiveRestartIndex(PRIMITIVE_RESTART_INDEX)
+
+        # Query the supported anisotropic filtering level once, before loading textures
+        if glInitTextureFilterAnisotropicEXT():
+            self.anisotropy = min(MAX_ANISOTROPY, float(glGetFloatv(GL_MAX_TEXTURE_MAX_ANISOTROPY_EXT)))
+
+        # Load the texture image
+        self.texture = self.load_texture(self.decoded_pixels(self.texture_decoder, self.texture_image))
+
+        # Build the sphere mesh and its shader once and keep them on the GPU
+        self._sphere_program = compile_program(SPHERE_VERTEX_SHADER, SPHERE_FRAGMENT_SHADER)
+        self._mvp_location = glGetUniformLocation(self._sphere_program, "uMVP")
+        self.create_sphere_mesh(32, 32)  # slices, stacks
 
         # Load the background image as a texture
         if len(self.background_image) > 0:
-            self.bg_texture = self.load_texture(self.background_image)
+            self.bg_texture = self.load_texture(self.decoded_pixels(self.bg_texture_decoder, self.background_image))
+            self.create_background_quad()
 
     def resizeGL(self, w: int, h: int) -> None:
         """
@@ -52,128 +411,316 @@ class OpenGLWindow(QOpenGLWidget):
         :param h: The new height of the widget.
         """
         glViewport(0, 0, w, h)  # Set the viewport to cover the whole widget
-        glMatrixMode(GL_PROJECTION)  # Set up the projection matrix
-        glLoadIdentity()
-        gluPerspective(45.0, w / h if h != 0 else 1.0, 0.1, 100.0)  # Set perspective projection
-        glMatrixMode(GL_MODELVIEW)  # Switch back to the model view matrix
+        self.projection = perspective(45.0, w / h if h != 0 else 1.0, 0.1, 100.0)  # Set perspective projection
 
-    def paintGL(self) -> None:
+    def _paint_no_bg(self) -> None:
         """
-        Render the scene. Called every time the widget needs to be repainted.
+        Render the scene without a background, used as paintGL when no background image is set.
         Clears the screen and draws a rotating textured sphere.
         """
         # Clear screen and depth buffer
-        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)  
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
 
-        # Reset transformations
-        glLoadIdentity()
+        # Draw the textured sphere
+        self.draw_textured_sphere(self.sphere_mvp())
+
+    def _paint_with_bg(self) -> None:
+        """
+        Render the scene with a background, used as paintGL when a background image is set.
+        Clears the depth buffer, draws the background and a rotating textured sphere.
+        """
+        # Clear only the depth buffer, the full-screen background overwrites every pixel
+        glClear(GL_DEPTH_BUFFER_BIT)
 
         # Render the background
-        if self.bg_texture is not None:
-            self.render_background()
+        self.render_background()
 
+        # Draw the textured sphere
+        self.draw_textured_sphere(self.sphere_mvp())
+
+    def sphere_mvp(self) -> np.ndarray:
+        """
+        Build the model-view-projection matrix of the rotating sphere for the current frame.
+
+        :return: The 4x4 model-view-projection matrix (row-major).
+        """
         # Move camera back to see the sphere
         # If you want to see the cube closer, then change camera position.
         # This line controls the camera's position.
-        glTranslatef(0.0, 0.0, -4.5)
+        view = translation(0.0, 0.0, -4.5)
 
         # Rotate the sphere
-        glRotatef(self.angle, 2.0, -1.0, -1.0)
-        # glRotatef(self.angle, 1.0, 0.0, 0.0)  # Rotate the sphere around the X-axis
-        # glRotatef(self.angle, 0.0, 1.0, 0.0)  # Rotate the sphere around the Y-axis
-        # glRotatef(self.angle, 0.0, 0.0, 1.0)  # Rotate the sphere around the Z-axis
+        model = rotation(self.angle, 2.0, -1.0, -1.0)
+        # model = rotation(self.angle, 1.0, 0.0, 0.0)  # Rotate the sphere around the X-axis
+        # model = rotation(self.angle, 0.0, 1.0, 0.0)  # Rotate the sphere around the Y-axis
+        # model = rotation(self.angle, 0.0, 0.0, 1.0)  # Rotate the sphere around the Z-axis
 
-        # Apply scaling to increase the cube size
-        glScalef(1.0, 1.0, 1.0)  # glScalef(2.0, 2.0, 2.0)
+        # Apply scaling to set the radius of the unit sphere mesh
+        model = model @ scaling(1.5, 1.5, 1.5)  # scaling(1.0, 1.0, 1.0)
 
-        # Draw the textured sphere
-        # self.draw_textured_sphere(1.0, 32, 32)  # radius, slices, stacks
-        self.draw_textured_sphere(1.5, 32, 32)  # radius, slices, stacks
+        return self.projection @ view @ model
+
+    def create_background_quad(self) -> None:
+        """
+        Upload a full-screen quad in clip space and compile the shader drawing it.
+        """
+        # (x, y, s, t) for each corner, in triangle strip order
+        vertices = np.array([[-1.0, -1.0, 0.0, 0.0],
+                             [1.0, -1.0, 1.0, 0.0],
+                             [-1.0, 1.0, 0.0, 1.0],
+                             [1.0, 1.0, 1.0, 1.0]], dtype=np.float32)
+
+        self._bg_program = compile_program(BACKGROUND_VERTEX_SHADER, BACKGROUND_FRAGMENT_SHADER)
+
+        self._bg_vao = glGenVertexArrays(1)
+        self.bind_vertex_array(self._bg_vao)
+
+        self._bg_vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self._bg_vbo)
+        glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices, GL_STATIC_DRAW)
+
+        stride = vertices.strides[0]
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(0, 2, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(0))
+        glEnableVertexAttribArray(1)
+        glVertexAttribPointer(1, 2, GL_FLOAT, GL_FALSE, stride, ctypes.c_void_p(2 * vertices.itemsize))
+
+        self.bind_vertex_array(0)
 
     def render_background(self) -> None:
         """
         Draws a textured quad as the background using the background image.
         """
-        glDisable(GL_DEPTH_TEST)
-        glMatrixMode(GL_PROJECTION)
-        glPushMatrix()
-        glLoadIdentity()
-        gluOrtho2D(0, self.width(), 0, self.height())
-        glMatrixMode(GL_MODELVIEW)
-        glPushMatrix()
-        glLoadIdentity()
+        self.set_depth_test(False)
 
         # Bind the background texture
-        glBindTexture(GL_TEXTURE_2D, self.bg_texture)
+        self.bind_texture(self.bg_texture)
 
         # Draw a quad that covers the entire window
-        glBegin(GL_QUADS)
-        glTexCoord2f(0.0, 0.0)
-        glVertex2f(0.0, 0.0)
-        glTexCoord2f(1.0, 0.0)
-        glVertex2f(self.width(), 0.0)
-        glTexCoord2f(1.0, 1.0)
-        glVertex2f(self.width(), self.height())
-        glTexCoord2f(0.0, 1.0)
-        glVertex2f(0.0, self.height())
-        glEnd()
-
-        # Restore the previous projection and modelview matrices
-        glMatrixMode(GL_PROJECTION)
-        glPopMatrix()
-        glMatrixMode(GL_MODELVIEW)
-        glPopMatrix()
-
-        glEnable(GL_DEPTH_TEST)
+        self.use_program(self._bg_program)
+        self.bind_vertex_array(self._bg_vao)
+        glDrawArrays(GL_TRIANGLE_STRIP, 0, 4)
+
+    def set_depth_test(self, enabled: bool) -> None:
+        """
+        Enable or disable depth testing, skipping the GL call if it is already in that state.
+
+        :param enabled: Whether depth testing should be enabled.
+        """
+        if self._gl_state['depth_test'] != enabled:
+            if enabled:
+                glEnable(GL_DEPTH_TEST)
+            else:
+                glDisable(GL_DEPTH_TEST)
+            self._gl_state['depth_test'] = enabled
+
+    def bind_texture(self, texture_id: int) -> None:
+        """
+        Bind a 2D texture, skipping the GL call if it is already bound.
+
+        :param texture_id: The OpenGL texture ID.
+        """
+        if self._gl_state['bound_tex'] != texture_id:
+            glBindTexture(GL_TEXTURE_2D, texture_id)
+            self._gl_state['bound_tex'] = texture_id
+
+    def forget_texture_binding(self) -> None:
+        """
+        Forget the cached texture binding. Connected to resized, which Qt emits whenever it
+        recreates the widget's framebuffer (resize, reparent, screen change), leaving texture 0 bound.
+        """
+        self._gl_state['bound_tex'] = None
+
+    def use_program(self, program: int) -> None:
+        """
+        Use a shader program, skipping the GL call if it is already in use.
+
+        :param program: The OpenGL program ID.
+        """
+        if self._gl_state['program'] != program:
+            glUseProgram(program)
+            self._gl_state['program'] = program
+
+    def bind_vertex_array(self, vao: int) -> None:
+        """
+        Bind a vertex array object, skipping the GL call if it is already bound.
+
+        :param vao: The OpenGL vertex array object ID.
+        """
+        if self._gl_state['vao'] != vao:
+            glBindVertexArray(vao)
+            self._gl_state['vao'] = vao
+
+    def showEvent(self, event: QShowEvent) -> None:
+        """
+        Start the animation when the widget is shown.
+
+        :param event: The show event.
+        """
+        super().showEvent(event)
+
+        # Track minimizing and occlusion of the top-level window as well
+        window_handle = self.window().windowHandle()
+        if window_handle is not None and window_handle is not self.window_handle:
+            window_handle.visibilityChanged.connect(self.on_visibility_changed)
+            self.window_handle = window_handle
+
+        self.start_animation()
+
+    def hideEvent(self, event: QHideEvent) -> None:
+        """
+        Stop the animation when the widget is hidden.
+
+        :param event: The hide event.
+        """
+        super().hideEvent(event)
+        self.stop_animation()
+
+    def on_visibility_changed(self, visibility: QWindow.Visibility) -> None:
+        """
+        Pause the animation while the top-level window is hidden or minimized.
+
+        :param visibility: The new visibility of the top-level window.
+        """
+        if visibility in (QWindow.Hidden, QWindow.Minimized):
+            self.stop_animation()
+        elif self.isVisible():
+            self.start_animation()
+
+    def start_animation(self) -> None:
+        """
+        Resume the frameSwapped-driven animation loop if it is not running.
+        """
+        if not self.animating:
+            self.animating = True
+            self.elapsed.restart()  # Do not jump over the time spent paused
+            self.update_frame()
+
+    def stop_animation(self) -> None:
+        """
+        Stop requesting new frames until the animation is started again.
+        """
+        self.animating = False
+        self.fallback_timer.stop()
 
     def update_frame(self) -> None:
         """
         Update the rotation angle and repaint the widget.
-        This is called periodically by the QTimer to animate the sphere.
+        This is called on every frameSwapped signal, or by the fallback timer, to animate the sphere.
         """
-        self.angle += 0.5  # 1.0  # Increment rotation angle speed
+        if not self.animating:  # Cleared by hideEvent, so no per-frame isVisible() call is needed
+            return
+
+        dt = self.elapsed.restart() / 1000.0  # Seconds since the previous frame
+        self.angle = (self.angle + ROTATION_SPEED * dt) % 360.0  # Frame-rate independent rotation
         self.update()  # Request an update (repaint)
+        self.fallback_timer.start()  # Restart the fallback in case no frame gets swapped
 
-    def load_texture(self, image_file: str) -> int:
+    def decoded_pixels(self, decoder: TextureDecoder, image_file: str) -> np.ndarray:
         """
-        Load a texture from an image file using the Pillow library.
+        Get the pixels decoded in the background, or decode the image again if they have
+        already been uploaded, e.g. when initializeGL runs again for a recreated context.
 
-        :param image_file: The file path of the image to load as a texture.
-        :return: The OpenGL texture ID.
+        :param decoder: The decoder started in __init__ for the image.
+        :param image_file: The file path of the image decoded by the decoder.
+        :return: The (height, width, 4) uint8 pixel array.
         """
-        texture_id = glGenTextures(1)
-        glBindTexture(GL_TEXTURE_2D, texture_id)
+        pixels = decoder.take()
+        if pixels is None:
+            pixels = decode_image(image_file)
+        return pixels
 
-        # Load the image using Pillow
-        image = Image.open(image_file)
-        image = image.transpose(Image.FLIP_TOP_BOTTOM)  # Flip the image vertically for OpenGL
-        img_data = image.convert("RGBA").tobytes()
+    def load_texture(self, img_data: np.ndarray) -> int:
+        """
+        Load a texture from pixels decoded by decode_image.
 
-        # Create the texture
-        glTexImage2D(GL_TEXTURE_2D, 0, GL_RGBA, image.width, image.height, 0, GL_RGBA, GL_UNSIGNED_BYTE, img_data)
+        :param img_data: The (height, width, 4) uint8 RGBA pixels to load as a texture.
+        :return: The OpenGL texture ID.
+        """
+        texture_id = glGenTextures(1)
+        self.bind_texture(texture_id)
+
+        # Allocate the texture with its full mip chain. The images are sRGB encoded,
+        # let the sampler hardware decode them to linear.
+        height, width = img_data.shape[:2]
+        levels = max(width, height).bit_length()  # floor(log2(size)) + 1
+        if bool(glTexStorage2D):
+            glTexStorage2D(GL_TEXTURE_2D, levels, GL_SRGB8_ALPHA8, width, height)
+        else:  # Immutable storage needs OpenGL 4.2 or ARB_texture_storage
+            glTexImage2D(GL_TEXTURE_2D, 0, GL_SRGB8_ALPHA8, width, height, 0, GL_RGBA, GL_UNSIGNED_BYTE, None)
+
+        # Stage the pixels in a pixel buffer object so the driver can DMA them to the GPU
+        pbo = glGenBuffers(1)
+        glBindBuffer(GL_PIXEL_UNPACK_BUFFER, pbo)
+        glBufferData(GL_PIXEL_UNPACK_BUFFER, img_data.nbytes, None, GL_STREAM_DRAW)
+        buffer = glMapBufferRange(GL_PIXEL_UNPACK_BUFFER, 0, img_data.nbytes,
+                                  GL_MAP_WRITE_BIT | GL_MAP_INVALIDATE_BUFFER_BIT)
+        ctypes.memmove(buffer, img_data.ctypes.data, img_data.nbytes)
+        glUnmapBuffer(GL_PIXEL_UNPACK_BUFFER)
+
+        # Fill the base level from the bound pixel buffer object
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        glTexSubImage2D(GL_TEXTURE_2D, 0, 0, 0, width, height, GL_RGBA, GL_UNSIGNED_BYTE, None)
+
+        glBindBuffer(GL_PIXEL_UNPACK_BUFFER, 0)
+        glDeleteBuffers(1, [pbo])
+
+        glGenerateMipmap(GL_TEXTURE_2D)
 
         # Set texture parameters
-        glTexParameterf(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR)
-        glTexParameterf(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_LINEAR_MIPMAP_LINEAR)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_LINEAR)
+        if self.anisotropy > 1.0:
+            glTexParameterf(GL_TEXTURE_2D, GL_TEXTURE_MAX_ANISOTROPY_EXT, self.anisotropy)
 
         return texture_id
 
-    def draw_textured_sphere(self, radius: float, slices: int, stacks: int) -> None:
+    def create_sphere_mesh(self, slices: int, stacks: int) -> None:
         """
-        Draw a textured sphere using gluSphere and apply a texture to it.
+        Build the unit sphere geometry once and upload it to GPU buffers bound to a VAO.
 
-        :param radius: The radius of the sphere.
         :param slices: The number of vertical segments (longitude).
         :param stacks: The number of horizontal segments (latitude).
         """
-        glBindTexture(GL_TEXTURE_2D, self.texture)  # Bind the texture
+        vertices, indices = sphere_mesh(slices, stacks)
+
+        self._sphere_vao = glGenVertexArrays(1)
+        self.bind_vertex_array(self._sphere_vao)
+
+        glBindBuffer(GL_ARRAY_BUFFER, glGenBuffers(1))
+        # Upload the packed records as raw bytes, PyOpenGL has no GL type for structured dtypes
+        glBufferData(GL_ARRAY_BUFFER, vertices.nbytes, vertices.view(np.uint8), GL_STATIC_DRAW)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, glGenBuffers(1))
+        glBufferData(GL_ELEMENT_ARRAY_BUFFER, indices.nbytes, indices, GL_STATIC_DRAW)
+
+        # Attribute locations match the layout qualifiers of the sphere shader. The integer
+        # components are normalized back to [-1, 1] and [0, 1] by the vertex fetch.
+        stride = SPHERE_VERTEX_DTYPE.itemsize
+        fields = SPHERE_VERTEX_DTYPE.fields
+        glEnableVertexAttribArray(0)
+        glVertexAttribPointer(0, 3, GL_SHORT, GL_TRUE, stride, ctypes.c_void_p(fields['pos'][1]))
+        glEnableVertexAttribArray(1)
+        glVertexAttribPointer(1, 3, GL_SHORT, GL_TRUE, stride, ctypes.c_void_p(fields['nrm'][1]))
+        glEnableVertexAttribArray(2)
+        glVertexAttribPointer(2, 2, GL_UNSIGNED_SHORT, GL_TRUE, stride, ctypes.c_void_p(fields['uv'][1]))
+
+        self.bind_vertex_array(0)
+        self._index_count = indices.size
+
+    def draw_textured_sphere(self, mvp: np.ndarray) -> None:
+        """
+        Draw the cached sphere mesh with the sphere texture applied to it.
+
+        :param mvp: The model-view-projection matrix (row-major) to draw the sphere with.
+        """
+        self.set_depth_test(True)
+        self.bind_texture(self.texture)  # Bind the texture
 
-        # Create a new quadric object for the sphere
-        quadric = gluNewQuadric()
-        gluQuadricTexture(quadric, GL_TRUE)  # Enable texturing for the sphere
-        gluSphere(quadric, radius, slices, stacks)  # Draw the sphere
+        self.use_program(self._sphere_program)
+        glUniformMatrix4fv(self._mvp_location, 1, GL_TRUE, mvp)
 
-        gluDeleteQuadric(quadric)  # Clean up the quadric object
+        self.bind_vertex_array(self._sphere_vao)
+        glDrawElements(GL_TRIANGLE_STRIP, self._index_count, GL_UNSIGNED_INT, None)
 
 
 class MainWindow(QMainWindow):
@@ -201,6 +748,15 @@ def main() -> None:
     """
     The main function to initialize and run the PyQt5 application.
     """
+    # Request an OpenGL 3.3 core profile context with vsync, before any widget is created
+    fmt = QSurfaceFormat()
+    fmt.setVersion(3, 3)
+    fmt.setProfile(QSurfaceFormat.CoreProfile)
+    fmt.setDepthBufferSize(24)
+    fmt.setSwapInterval(1)  # Sync buffer swaps, and so frameSwapped, to the display refresh
+    fmt.setColorSpace(QSurfaceFormat.sRGBColorSpace)  # Let Qt re-encode the widget's sRGB texture
+    QSurfaceFormat.setDefaultFormat(fmt)
+
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()